@@ -1,123 +1,221 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from selectolax.lexbor import LexborHTMLParser
+import httpx
+import orjson
 
-from selenium.webdriver.common.by import By
 from datetime import datetime
+import argparse
+import asyncio
+import atexit
 import json
 import os
 import re
-import time
 import csv
-from urllib.parse import urlparse, parse_qs, urlencode
+import itertools
+import mmap
+import time
 
 
 # Constants
 SHOPIFY_SEARCH_URL = "https://apps.shopify.com/search?q=Quiz"
 DATA_FILE = "data/past_apps.json"
-## Chromedriver global path is replaced by the expression in the "driver" var
 CSV_FOLDER = "data/csv_exports"
-
-# Configure Selenium
-chrome_options = webdriver.ChromeOptions()
-chrome_options.add_argument("--headless")  # Run in headless mode
-chrome_options.add_argument("--disable-blink-features=AutomationControlled")  # Bypass detection
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-gpu")
-chrome_options.add_argument("--disable-dev-shm-usage")
+APP_FETCH_CONCURRENCY = 8  # Search pages requested concurrently per batch
+REQUEST_TIMEOUT = 10  # Seconds before a search page request is abandoned
+REQUEST_RETRIES = 3  # Attempts per search page on network errors, 429 and 5xx responses
+RETRY_BACKOFF = 0.5  # Seconds; doubled after each failed attempt
+CSV_BUFFER_SIZE = 1 << 20  # 1 MiB write buffer for CSV exports
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
 
 # Ensure data directories exist
 os.makedirs("data/csv_exports", exist_ok=True)  # ✅ This prevents crashes
 
+BAD_URL_PATTERNS = re.compile(r"(categories|stories|sitemap|login|help|about|support)")
+TITLE_SKIP = re.compile(r"^(?:\d+|Previous|Next)$")  # Pagination links that look like app cards
+
 def clean_url(url):
-    """Remove entire UTM parameters if 'surface' is found anywhere in the string."""
-    parsed_url = urlparse(url)
-    query_params = parse_qs(parsed_url.query)
-    
-    if any("surface" in k.lower() for k in query_params.keys()):
-        return f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
-    
-    return url
+    """Remove entire UTM parameters if 'surface' is found anywhere in the query string.
+
+    Returns the cleaned URL and whether its path matches BAD_URL_PATTERNS.
+    """
+    base, _, query = url.partition("?")
+    # Card links are always on apps.shopify.com, so matching the base URL only ever hits the path
+    is_bad = bool(BAD_URL_PATTERNS.search(base))
+
+    if "surface" in query.lower():
+        return base, is_bad
+
+    return url, is_bad
+
+# Every node _extract_card needs, matched in a single traversal of the card
+CARD_FIELDS_SELECTOR = (
+    "a[href^='https://apps.shopify.com/'], [data-controller='popover-modal'], .built-for-shopify-badge"
+)
+
+def _extract_card(card):
+    """Return (href, title, is_ad, is_bfs) for an app card from one selector query."""
+    link = None
+    is_ad = is_bfs = False
+
+    for node in card.css(CARD_FIELDS_SELECTOR):
+        attrs = node.attributes
+        if attrs.get("data-controller") == "popover-modal":
+            is_ad = True
+        elif "built-for-shopify-badge" in (attrs.get("class") or "").split():
+            is_bfs = True
+        elif link is None and node.tag == "a":
+            link = node
+
+    if link is None:
+        return None, "", is_ad, is_bfs
+    return link.attributes.get("href"), " ".join(link.text().split()), is_ad, is_bfs
+
+def _parse_page(html):
+    """Return the valid app listings on a search results page, or None past the last page.
+
+    Cards without a link or title, pagination links and non-app URLs are dropped here,
+    so fetch_apps only has to deduplicate and rank what comes back.
+    """
+    tree = LexborHTMLParser(html)
+
+    header = tree.css_first("#app-header > div > p")
+    if header is not None and header.text(strip=True).startswith("Sorry, nothing here"):
+        return None
+
+    cards = tree.css("[data-controller='app-card']")
+    if not cards:
+        return None
+
+    apps = []
+    for card in cards:
+        try:
+            href, title, is_ad, is_bfs = _extract_card(card)
+            if not title or not href or TITLE_SKIP.match(title):
+                continue
+
+            clean_link, is_bad = clean_url(href)
+            if is_bad:
+                continue
+
+            apps.append({"name": title, "url": clean_link, "ad": is_ad, "bfs": is_bfs})
+
+        except Exception as e:
+            print(f"🔥 Error processing app link: {e}")
+
+    return apps
+
+# Event loop and HTTP client kept alive across compare_apps() calls in the same process,
+# so repeated runs (see --interval) reuse pooled connections instead of reconnecting
+_LOOP = None
+_CLIENT = None
+
+def _get_loop():
+    """Return the long-lived event loop, creating it on first use."""
+    global _LOOP
+    if _LOOP is None:
+        _LOOP = asyncio.new_event_loop()
+    return _LOOP
+
+def _get_client():
+    """Return the shared AsyncClient; must be called from inside the shared loop."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = httpx.AsyncClient(headers=REQUEST_HEADERS, timeout=REQUEST_TIMEOUT, follow_redirects=True)
+    return _CLIENT
+
+def close():
+    """Close the shared HTTP client and event loop."""
+    global _LOOP, _CLIENT
+    if _LOOP is None:
+        return
+    if _CLIENT is not None:
+        _LOOP.run_until_complete(_CLIENT.aclose())
+        _CLIENT = None
+    _LOOP.run_until_complete(_LOOP.shutdown_asyncgens())
+    _LOOP.close()
+    _LOOP = None
+
+atexit.register(close)
+
+async def _fetch_page(client, page):
+    """Fetch and parse one search results page; returns its app listings, or None past the last page."""
+    search_url = f"{SHOPIFY_SEARCH_URL}&page={page}" if page > 1 else SHOPIFY_SEARCH_URL
+    print(f"Scraping: {search_url}")
+    for attempt in range(REQUEST_RETRIES):
+        try:
+            response = await client.get(search_url)
+            if response.status_code == 404:
+                print(f"No apps found on page {page}. Stopping iteration.")
+                return None
+            response.raise_for_status()
+            break
+        except httpx.HTTPError as e:
+            if isinstance(e, httpx.HTTPStatusError):
+                transient = e.response.status_code == 429 or e.response.status_code >= 500
+            else:
+                transient = isinstance(e, httpx.TransportError)
+            # A missing page would shift every later rank, so give up on the run rather than skip it
+            if not transient or attempt == REQUEST_RETRIES - 1:
+                raise
+            delay = RETRY_BACKOFF * 2 ** attempt
+            print(f"🔁 {type(e).__name__} for {search_url}, retrying in {delay}s...")
+            await asyncio.sleep(delay)
+
+    apps = _parse_page(response.text)
+    if apps is None:
+        print(f"No more apps found on page {page}. Stopping iteration.")
+    return apps
+
+async def _fetch_all_pages():
+    """Fetch search pages APP_FETCH_CONCURRENCY at a time until the end-of-results page."""
+    pages = []
+    page = 1
 
-BAD_URL_PATTERNS = re.compile(r"(categories|stories|sitemap|login|help|about|support)")
+    client = _get_client()
+    while True:
+        # Let the whole batch settle before re-raising a failure, so no request outlives this run
+        batch = await asyncio.gather(*(
+            _fetch_page(client, p) for p in range(page, page + APP_FETCH_CONCURRENCY)
+        ), return_exceptions=True)
+        for apps in batch:
+            if apps is None:
+                return pages  # Pages past the end of the results are never used, even if they failed
+            if isinstance(apps, BaseException):
+                raise apps
+            pages.append(apps)
+        page += APP_FETCH_CONCURRENCY
 
 def fetch_apps():
-    """Fetch app names and links using <a> href extraction."""
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    """Fetch app names and links from the server-rendered search pages."""
+    pages = _get_loop().run_until_complete(_fetch_all_pages())
 
-    
+    # Pages are fetched concurrently, so ranks are assigned here in page order
     all_apps = []
-    page = 1
+    organic_rank = 0  # Organic apps seen so far across all pages
+    # Shared across pages so an app repeated on a later page isn't counted twice
+    seen_ads = set()
+    seen_organic = set()
+
+    for page_apps in pages:
+        for app in page_apps:
+            # Allow the same app to appear twice if once as an ad and once organically
+            if app["ad"]:
+                if app["url"] in seen_ads:
+                    continue  # Skip duplicate ads
+                seen_ads.add(app["url"])
+                app["rank"] = None
+            else:
+                if app["url"] in seen_organic:
+                    continue  # Skip duplicate organic results
+                seen_organic.add(app["url"])
+                organic_rank += 1  # Only increment rank for organic apps
+                app["rank"] = organic_rank
 
-    while True:
-        search_url = f"{SHOPIFY_SEARCH_URL}&page={page}" if page > 1 else SHOPIFY_SEARCH_URL
-        print(f"Scraping: {search_url}")
-        driver.get(search_url)
-        time.sleep(5)  # Static delay to prevent detection by Shopify
-
-        if driver.find_elements(By.CSS_SELECTOR, "#app-header > div > p"):
-            header_text = driver.find_element(By.CSS_SELECTOR, "#app-header > div > p").text
-            if header_text.startswith("Sorry, nothing here"):
-                print("No more apps found. Stopping iteration.")
-                break
-
-        app_cards = driver.find_elements(By.CSS_SELECTOR, "[data-controller='app-card']")
-        
-        if not app_cards:
-            print(f"No apps found on page {page}. Stopping iteration.")
-            break
-        
-        seen_ads = set()
-        seen_organic = set()
-        valid_apps = []
-        rank = len([app for app in all_apps if not app["ad"]])  # Maintain correct ranking
-
-        for card in app_cards:
-            try:
-                link_element = card.find_element(By.CSS_SELECTOR, "a[href^='https://apps.shopify.com/']")
-                link = link_element.get_attribute("href")
-                title = link_element.text.strip()
-                clean_link = clean_url(link)
-                # Detect if the app is an ad
-                is_ad = bool(card.find_elements(By.CSS_SELECTOR, "[data-controller='popover-modal']"))
-                # Detect if the app has the "Built for Shopify" badge
-                is_bfs = bool(card.find_elements(By.CSS_SELECTOR, ".built-for-shopify-badge"))
-
-                
-                if not title or not clean_link:
-                    continue
-                
-                if BAD_URL_PATTERNS.search(clean_link) or re.fullmatch(r"\d+", title) or title in ["Previous", "Next"]:
-                    continue
-                
-                # Allow the same app to appear twice if once as an ad and once organically
-                if is_ad:
-                    if clean_link in seen_ads:
-                        continue  # Skip duplicate ads
-                    seen_ads.add(clean_link)
-                else:
-                    if clean_link in seen_organic:
-                        continue  # Skip duplicate organic results
-                    seen_organic.add(clean_link)
-                    rank += 1  # Only increment rank for organic apps
-                
-                app_entry = {
-                "name": title,
-                "url": clean_link,
-                "ad": is_ad,
-                "bfs": is_bfs,  # New BFS key
-                "rank": None if is_ad else rank
-                }
-                
-                valid_apps.append(app_entry)
-            
-            except Exception as e:
-                print(f"🔥 Error processing app link: {e}")
-        
-        all_apps.extend(valid_apps)
-        page += 1
+            all_apps.append(app)
     
-    driver.quit()
     return {"all_apps": all_apps}
 
 def load_past_apps():
@@ -127,13 +225,15 @@ def load_past_apps():
         return {"all_apps": [], "new_apps": [], "top_5": []}  # Default structure
 
     try:
-        with open(DATA_FILE, "r") as f:
-            data = f.read().strip()
-            if not data:
+        with open(DATA_FILE, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:  # mmap can't map an empty file
                 print("WARNING: past_apps.json was empty. Resetting data.")
                 return {"all_apps": [], "new_apps": [], "top_5": []}
 
-            past_apps = json.loads(data)
+            # Parse straight from the mapped pages instead of copying the file into memory first
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                past_apps = orjson.loads(view)
+
             if isinstance(past_apps, dict):
                 return past_apps
             elif isinstance(past_apps, list):  
@@ -142,15 +242,15 @@ def load_past_apps():
             else:
                 print("ERROR: Unexpected data format in past_apps.json. Resetting data.")
                 return {"all_apps": [], "new_apps": [], "top_5": []}  
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print("ERROR: past_apps.json is corrupted. Resetting data.")
         return {"all_apps": [], "new_apps": [], "top_5": []}  
 
 def save_current_apps(data):
     """Save current apps to JSON."""
     os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    with open(DATA_FILE, "wb") as f:
+        f.write(orjson.dumps(data))  # Compact: machine-read only, the console output is pretty-printed
 
 def save_top5_links():
     """Save Top 5 app review links separately."""
@@ -159,90 +259,110 @@ def save_top5_links():
 
     # Save only the review URLs
     with open("data/top_5_links.json", "w") as f:
-        json.dump([app["url"] + "/reviews?sort_by=newest" for app in top_5], f, indent=4)
+        json.dump([app["url"] + "/reviews?sort_by=newest" for app in top_5], f, separators=(",", ":"))
 
     print("✅ Saved Top 5 review links.")
 
 
+APP_CSV_HEADER = ["name", "url", "ad", "bfs", "rank"]
+
 def save_all_data_to_csv(filename, app_data):
     """Save all app data into a single CSV file with section headers."""
     os.makedirs(CSV_FOLDER, exist_ok=True)
     filepath = os.path.join(CSV_FOLDER, filename)
 
-    with open(filepath, "w", newline="") as f:
+    with open(filepath, "w", newline="", buffering=CSV_BUFFER_SIZE) as f:
         writer = csv.writer(f)
 
-        # Write section: All Apps
-        writer.writerow(["[All Apps]"])
-        writer.writerow(["name", "url", "ad", "bfs", "rank"])
-        for app in app_data["all_apps"]:
-            writer.writerow([app["name"], app["url"], app["ad"], app["bfs"], app["rank"]])
-        writer.writerow([])  # Blank line for separation
-
-        # Write section: New Apps (ONLY FROM LAST RUN)
-        writer.writerow(["[New Apps]"])
-        writer.writerow(["name", "url", "ad", "bfs", "rank"])
-        for app in app_data["new_apps"]:
-            writer.writerow([app["name"], app["url"], app["ad"], app["bfs"], app["rank"]])
-        writer.writerow([])  # Blank line for separation
-
-        # Write section: Top 5 (NO AD APPS)
-        writer.writerow(["[Top 5]"])
-        writer.writerow(["name", "url", "ad", "bfs", "rank"])
-        for app in app_data["top_5"]:
-            writer.writerow([app["name"], app["url"], app["ad"], app["bfs"], app["rank"]])
+        def section(title, apps):
+            return itertools.chain(
+                [[title], APP_CSV_HEADER],
+                ([app["name"], app["url"], app["ad"], app["bfs"], app["rank"]] for app in apps),
+            )
+
+        # All Apps, New Apps (ONLY FROM LAST RUN) and Top 5 (NO AD APPS), blank line between sections
+        writer.writerows(itertools.chain(
+            section("[All Apps]", app_data["all_apps"]),
+            [[]],
+            section("[New Apps]", app_data["new_apps"]),
+            [[]],
+            section("[Top 5]", app_data["top_5"]),
+        ))
 
     print(f"✅ CSV saved: {filepath}")
 
+CSV_SPECIAL_CHARS = re.compile(r'[,"\r\n]')
+
+def _csv_field(value):
+    """Quote a text field exactly as csv.writer's default QUOTE_MINIMAL dialect would."""
+    if CSV_SPECIAL_CHARS.search(value):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
 def save_to_historical_apps_csv(filename, app_data):
     """Append the latest app ranking data to a historical CSV file."""
     os.makedirs(CSV_FOLDER, exist_ok=True)
     filepath = os.path.join(CSV_FOLDER, filename)
-    file_exists = os.path.isfile(filepath)
 
-    with open(filepath, "a", newline="") as f:
-        writer = csv.writer(f)
+    # Format the whole run in memory, then append it in as few writes as the OS allows
+    fd = os.open(filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        lines = []
 
-        # If the file is new, add a header
-        if not file_exists:
-            writer.writerow(["date", "name", "url", "ad", "bfs", "rank"])
+        # If the file is new (or empty), add a header
+        if os.fstat(fd).st_size == 0:
+            lines.append("date,name,url,ad,bfs,rank\r\n")
 
-        # Append new run's data
+        # Append new run's data; the schema is fixed, so rows are formatted directly
         date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        writer.writerows([
-            [date, app["name"], app["url"], app["ad"], app["bfs"], app["rank"]]
+        lines.extend(
+            f"{date},{_csv_field(app['name'])},{_csv_field(app['url'])},{app['ad']},{app['bfs']},"
+            f"{'' if app['rank'] is None else app['rank']}\r\n"
             for app in app_data["all_apps"]
-        ])
+        )
+
+        # os.write may write fewer bytes than asked, so keep going until the whole run is on disk
+        data = memoryview("".join(lines).encode("utf-8"))
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
 
     print(f"📜 Historical Apps CSV updated: {filepath}")
 
 
+_MISSING = object()  # Distinguishes "not in past data" from a stored rank of None
+
 def compare_apps():
     """Compare current apps with past apps and detect ranking changes."""
     past_data = load_past_apps()
-    past_apps = {app["name"]: app.get("rank", None) for app in past_data.get("all_apps", [])}
-    past_ranks = {app["name"]: app["rank"] for app in past_data.get("all_apps", [])}
+    past_ranks = {app["name"]: app.get("rank") for app in past_data.get("all_apps", [])}
 
     fetched_data = fetch_apps()
     current_apps = fetched_data["all_apps"]
 
+    # Single pass: an absent name is a new app, a changed non-null rank is a ranking change,
+    # and every app records its previous rank (None if it wasn't listed before)
+    new_apps = []
     ranking_changes = []
     for app in current_apps:
-        prev_rank = past_apps.get(app["name"], None)
+        prev_rank = past_ranks.get(app["name"], _MISSING)
+        if prev_rank is _MISSING:
+            new_apps.append(app)
+            app["previous_rank"] = None
+            continue
+
+        app["previous_rank"] = prev_rank
         if prev_rank is not None and prev_rank != app["rank"]:
             ranking_changes.append({"name": app["name"], "old_rank": prev_rank, "new_rank": app["rank"]})
 
     output = {
         "all_apps": current_apps,
-        "new_apps": [app for app in current_apps if app["name"] not in past_apps],
+        "new_apps": new_apps,
         "ranking_changes": ranking_changes,
-        "top_5": [app for app in current_apps if not app["ad"]][:5],  # Exclude ads, keep only first 5 organic apps
+        "top_5": list(itertools.islice((app for app in current_apps if not app["ad"]), 5)),  # Exclude ads, keep only first 5 organic apps
     }
 
-    # Update current apps with previous ranks
-    for app in current_apps:
-        app["previous_rank"] = past_ranks.get(app["name"], None)  # Assign None if no previous rank
-
     print(json.dumps(output, indent=4))
     save_current_apps(output)
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -251,4 +371,19 @@ def compare_apps():
     save_to_historical_apps_csv("historical_apps.csv", output)  # Save historical data
 
 if __name__ == "__main__":
-    compare_apps()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Check the Shopify app store for new and re-ranked apps.")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Keep running and re-check every N minutes instead of exiting after one run")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            compare_apps()
+        except Exception as e:
+            if not args.interval:
+                raise
+            # A failed fetch saves nothing, so the next check simply starts from the last saved run
+            print(f"❌ App check failed: {type(e).__name__}: {e}")
+        if not args.interval:
+            break
+        time.sleep(args.interval * 60)
@@ -3,29 +3,272 @@ from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from datetime import datetime
 import json
 import os
-import time
 import csv
+import hashlib
+import time
+import multiprocessing
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor
+
+import asyncio
+
+import aiohttp
+import lxml.etree
+import lxml.html
 
 # Constants
 ## Chromedriver global path is replaced by the expression in the "driver" var
 CSV_FOLDER = os.path.join(os.getcwd(), "data/csv_exports")  # Ensure correct path
+PAGE_LOAD_TIMEOUT = 10  # Seconds to wait for review cards to render
+REVIEW_WORKERS = 5  # Chrome processes for apps that need the Selenium fallback
+WORKER_STAGGER = 0.15  # Seconds between consecutive fallback apps' first requests
+CHROME_PROFILE_DIR = os.path.abspath("data/.chrome-profile")  # Persistent per-worker Chrome profiles
+CHROME_CACHE_DIR = os.path.abspath("data/.chrome-cache")  # Persistent per-worker HTTP disk caches
+CHROME_CACHE_SIZE = 256 * 1024 * 1024  # Bytes
+REQUEST_TIMEOUT = 15  # Seconds before a review page request is abandoned
+PAGE_BATCH = 8  # Most review pages requested together per app
+HOST_CONCURRENCY = 4  # Max in-flight requests to apps.shopify.com across all apps
+REQUEST_RETRIES = 3  # Attempts per review page on network errors and 5xx responses
+RETRY_BACKOFF = 0.5  # Seconds; doubled after each failed attempt
+CSV_BUFFER_SIZE = 1 << 20  # 1 MiB write buffer for CSV exports
+CHALLENGE_STATUSES = {403, 429, 503}  # Responses that mean Shopify wants a real browser
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# XPath equivalents of the Selenium CSS selectors (XPath 1.0 has no ends-with)
+RATING_XPATH = ".//*[substring(@aria-label, string-length(@aria-label) - 13) = 'out of 5 stars']"
+OVERALL_RATING_XPATH = (
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' app-reviews-metrics ')]/*[2][self::div]"
+    + RATING_XPATH[1:]
+)
+
+# Per-card lookups, compiled once; the date's whitespace is collapsed by libxml2 rather than in Python
+CARD_RATING = lxml.etree.XPath(RATING_XPATH)
+RATING_DATE_TEXT = lxml.etree.XPath("normalize-space(./following-sibling::div[1])")
+CARD_CONTENT = lxml.etree.XPath(".//*[@data-truncate-content-copy]/p")
+
+# Rating, date and content of every review card, pulled in a single WebDriver round-trip.
+# textContent (unlike innerText) needs no layout pass and matches lxml's text_content()
+EXTRACT_REVIEWS_JS = r"""
+return Array.from(document.querySelectorAll("[data-merchant-review]")).map(c => {
+    const r = c.querySelector("[aria-label$='out of 5 stars']");
+    let d = r && r.nextElementSibling;
+    while (d && d.tagName !== "DIV") d = d.nextElementSibling;
+    const p = c.querySelector("[data-truncate-content-copy] > p");
+    return {
+        rating: r ? parseFloat(r.getAttribute("aria-label")) : null,
+        date: d ? d.textContent.replace(/\s+/g, " ").replace("Edited ", "").trim() : null,
+        content: p ? p.textContent.trim() : null,
+    };
+});
+"""
+
+# URL patterns Chrome is told not to fetch (images, fonts, stylesheets, media)
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg",
+    "*.woff", "*.woff2", "*.ttf", "*.css", "*.mp4", "*.webm",
+]
 
 # Configure Selenium
 chrome_options = webdriver.ChromeOptions()
-chrome_options.add_argument("--headless")
+chrome_options.add_argument("--headless=new")
 chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+chrome_options.add_argument("--no-sandbox")
+chrome_options.add_argument("--disable-dev-shm-usage")  # /dev/shm is tiny in containers; use /tmp instead
+chrome_options.add_argument("--disable-extensions")
+chrome_options.add_argument("--disable-background-networking")
+chrome_options.add_argument("--disable-sync")
+chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+chrome_options.add_argument("--window-size=1280,2000")  # Tall enough to lay out a full page of reviews
 
 # Ensure necessary folders exist
 os.makedirs("data/csv_exports", exist_ok=True)
 os.makedirs("data", exist_ok=True)  # Just in case other scripts rely on this
+os.makedirs(CHROME_PROFILE_DIR, exist_ok=True)
+os.makedirs(CHROME_CACHE_DIR, exist_ok=True)
+
+def _parse_stars(label):
+    """Turn an aria-label like "4.5 out of 5 stars" into 4.5."""
+    return float(label[:label.index(" ")])
+
+def _review_key(app_url, review_date, content):
+    """Identify a review across runs; content is digested (stably, unlike hash()) to keep the set small."""
+    return app_url, review_date, hashlib.blake2b(content.encode("utf-8"), digest_size=8).digest()
+
+def load_seen_reviews():
+    """Return the keys of every review already in historical_reviews.csv."""
+    filename = os.path.join(CSV_FOLDER, "historical_reviews.csv")
+    if not os.path.isfile(filename):
+        return set()
+
+    with open(filename, newline="", encoding="utf-8") as f:
+        return {
+            _review_key(row["app_url"], row["review_date"], row["review_content"])
+            for row in csv.DictReader(f)
+        }
+
+async def _get_review_page(session, semaphore, url):
+    """Download one review page; returns its parsed tree, or None if Shopify served a challenge or kept failing."""
+    for attempt in range(REQUEST_RETRIES):
+        try:
+            async with semaphore:
+                async with session.get(url) as response:
+                    if response.status in CHALLENGE_STATUSES:
+                        print(f"🛡 Got HTTP {response.status} for {url}.")
+                        return None
+                    if response.status == 404:  # Batches can run past the last page
+                        return lxml.html.fromstring("<html></html>")
+                    if response.status < 400:
+                        return lxml.html.fromstring(await response.read())
+                    if response.status < 500:
+                        print(f"⚠ Got HTTP {response.status} for {url}.")
+                        return None
+                    error = f"HTTP {response.status}"  # Server errors are usually transient
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+            error = type(e).__name__
+
+        if attempt < REQUEST_RETRIES - 1:
+            delay = RETRY_BACKOFF * 2 ** attempt
+            print(f"🔁 {error} for {url}, retrying in {delay}s...")
+            await asyncio.sleep(delay)
+
+    # Returning None rather than raising keeps the other apps' results and hands this one to Selenium
+    print(f"⚠ {error} for {url} after {REQUEST_RETRIES} attempts, giving up on plain HTTP.")
+    return None
+
+async def fetch_reviews(session, semaphore, app_url, app_name, seen):
+    """Scrape an app's new reviews and its overall score from the server-rendered review pages.
+
+    Pages are processed in order until one has no reviews, no "Next" link, or only reviews
+    already in `seen` (see load_seen_reviews), since reviews are sorted newest first; reviews in
+    `seen` are left out of the result. Page 1 is requested alone, because on a repeat run it is
+    usually already collected; while pages keep producing new reviews, the next batch doubles, up
+    to PAGE_BATCH pages at a time. Returns
+    (reviews, overall_score), or None if Shopify answers with a challenge instead of a page (or a
+    page keeps failing), so the caller can retry the app in a real browser with fetch_reviews_selenium.
+    """
+    reviews = []
+    page = 1  # Start from page 1
+    batch_size = 1
+    overall_score = None  # ✅ Keep track of last known valid overall score
 
-def fetch_reviews(app_url, app_name):
-    """Scrape all reviews for a given app, iterating over pages until no more reviews exist."""
+    while True:
+        batch = range(page, page + batch_size)
+        for p in batch:
+            print(f"📄 Scraping page {p} of reviews for {app_name}: {app_url}&page={p}")
+        trees = await asyncio.gather(*(
+            _get_review_page(session, semaphore, f"{app_url}&page={p}") for p in batch
+        ))
+
+        for page, tree in zip(batch, trees):
+            if tree is None:
+                return None
+
+            # Check if reviews exist on this page
+            review_cards = tree.xpath("//*[@data-merchant-review]")
+            if not review_cards:
+                if page == 1 and not tree.xpath(OVERALL_RATING_XPATH):
+                    print(f"🛡 Page 1 for {app_name} has no review markup at all.")
+                    return None  # Not a real review page, most likely a JS challenge
+                print(f"🚫 No reviews found on page {page}, stopping.")
+                return reviews, overall_score  # No reviews = No more pages
+
+            # ✅ Only extract `overall_score` ONCE per app (page 1)
+            if page == 1:
+                try:
+                    overall_element = tree.xpath(OVERALL_RATING_XPATH)[0]
+                    overall_score = _parse_stars(overall_element.get("aria-label"))
+                    print(f"⭐ Overall score detected: {overall_score}")
+                except Exception as e:
+                    print(f"⚠ Could not find overall rating for {app_name}: {e}")
+
+            page_reviews = []
+            for card in review_cards:
+                try:
+                    # Extract rating from aria-label
+                    rating_element = CARD_RATING(card)[0]
+                    rating = _parse_stars(rating_element.get("aria-label"))
+
+                    # Extract date (next sibling div)
+                    date_text = RATING_DATE_TEXT(rating_element).replace("Edited ", "")
+                    if not date_text:
+                        raise ValueError("review date not found")
+
+                    # Extract content (direct child <p>)
+                    content_element = CARD_CONTENT(card)[0]
+                    content = content_element.text_content().strip()
+
+                    page_reviews.append({
+                        "app_name": app_name,
+                        "date": date_text,
+                        "star_rating": rating,
+                        "content": content,
+                        "overall_score": overall_score  # ✅ Persist across pages
+                    })
+
+                except Exception as e:
+                    print(f"🔥 Error processing review: {e}")
+
+            # Keep only reviews earlier runs missed; they are newest first, so a fully collected page
+            # means older pages are collected too
+            new_reviews = [r for r in page_reviews if _review_key(app_url, r["date"], r["content"]) not in seen]
+            if page_reviews and not new_reviews:
+                print(f"⏹ Page {page} for {app_name} was already collected, stopping.")
+                return reviews, overall_score
+            reviews.extend(new_reviews)
+
+            # Check if there's a "Next" page
+            if not tree.xpath("//a[@rel='next']"):
+                print(f"✅ All pages scraped for {app_name}.")
+                return reviews, overall_score  # No "Next" button → Last page reached
+
+        page += 1  # Next batch starts after the last page of this one
+        batch_size = min(batch_size * 2, PAGE_BATCH)  # Every page so far had new reviews
+
+async def _fetch_all_reviews(tasks, seen):
+    """Scrape every (link, app_name) concurrently over one HTTP session into {link: (reviews, overall_score)}; None marks a challenged app."""
+    semaphore = asyncio.Semaphore(HOST_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    # Keep-alive pool sized to the semaphore, with DNS cached for the whole run
+    connector = aiohttp.TCPConnector(limit=HOST_CONCURRENCY, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(headers=REQUEST_HEADERS, timeout=timeout, connector=connector) as session:
+        results = await asyncio.gather(*(
+            fetch_reviews(session, semaphore, link, app_name, seen) for link, app_name in tasks
+        ))
+    return {link: reviews for (link, _), reviews in zip(tasks, results)}
+
+# Per-process WebDriver for the Selenium fallback, started once by the pool initializer
+_DRIVER = None
+
+def _init_worker(driver_path, profile_slots):
+    """Start one headless Chrome per worker process and quit it when the worker exits."""
+    global _DRIVER
+    # Chrome locks its profile, so each worker claims its own slot; the same slot directories
+    # are reused on the next run, keeping Shopify's static assets in the HTTP cache
+    slot = profile_slots.get()
+    chrome_options.add_argument(f"--user-data-dir={os.path.join(CHROME_PROFILE_DIR, str(slot))}")
+    chrome_options.add_argument(f"--disk-cache-dir={os.path.join(CHROME_CACHE_DIR, str(slot))}")
+    chrome_options.add_argument(f"--disk-cache-size={CHROME_CACHE_SIZE}")
+    _DRIVER = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+    _DRIVER.implicitly_wait(0)  # Only explicit waits, so they never stack with implicit polling
+    # Reviews are read straight from the DOM, so never download assets that only affect rendering
+    _DRIVER.execute_cdp_cmd("Network.enable", {})
+    _DRIVER.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCE_PATTERNS})
+    multiprocessing.util.Finalize(_DRIVER, _DRIVER.quit, exitpriority=10)
+
+def fetch_reviews_selenium(driver, app_url, app_name, seen):
+    """Scrape an app's new reviews and overall score in headless Chrome, iterating over pages until no more new reviews exist."""
     reviews = []
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    driver.delete_all_cookies()  # Don't carry session state over from the previous app
 
     page = 1  # Start from page 1
     overall_score = None  # ✅ Keep track of last known valid overall score
@@ -35,10 +278,18 @@ def fetch_reviews(app_url, app_name):
         print(f"📄 Scraping page {page} of reviews for {app_name}: {paged_url}")
 
         driver.get(paged_url)
-        time.sleep(5)  # Keep static delay to avoid detection
 
-        # Check if reviews exist on this page
-        review_cards = driver.find_elements(By.CSS_SELECTOR, "[data-merchant-review]")
+        # Proceed as soon as review cards (or a "Next" link) render instead of a fixed delay
+        try:
+            WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "[data-merchant-review], a[rel='next']"))
+            )
+        except TimeoutException:
+            print(f"🚫 Timed out waiting for reviews on page {page}, stopping.")
+            break
+
+        # Extract every review card in one WebDriver round-trip
+        review_cards = driver.execute_script(EXTRACT_REVIEWS_JS)
         if not review_cards:
             print(f"🚫 No reviews found on page {page}, stopping.")
             break  # No reviews = No more pages, exit loop
@@ -47,39 +298,32 @@ def fetch_reviews(app_url, app_name):
         if page == 1:
             try:
                 overall_element = driver.find_element(By.CSS_SELECTOR, ".app-reviews-metrics > div:nth-child(2) [aria-label$='out of 5 stars']")
-                overall_score = float(overall_element.get_attribute("aria-label").split(" ")[0])
+                overall_score = _parse_stars(overall_element.get_attribute("aria-label"))
                 print(f"⭐ Overall score detected: {overall_score}")
             except Exception as e:
                 print(f"⚠ Could not find overall rating for {app_name}: {e}")
 
+        page_reviews = []
         for card in review_cards:
-            try:
-                # Extract rating from aria-label
-                rating_element = card.find_element(By.CSS_SELECTOR, "[aria-label$='out of 5 stars']")
-                rating = float(rating_element.get_attribute("aria-label").split(" ")[0])
-
-                # Extract date (next sibling div)
-                date_element = rating_element.find_element(By.XPATH, "./following-sibling::div")
-                date_text = date_element.text.replace("Edited ", "").strip()
-
-                # Extract content (direct child <p>)
-                content_element = card.find_element(By.CSS_SELECTOR, "[data-truncate-content-copy] > p")
-                content = content_element.text.strip()
-
-                # ✅ If `overall_score` is None, inherit last valid score
-                if overall_score is None:
-                    print(f"🔄 Using last known valid overall score: {overall_score}")
-
-                reviews.append({
-                    "app_name": app_name,
-                    "date": date_text,
-                    "star_rating": rating,
-                    "content": content,
-                    "overall_score": overall_score  # ✅ Persist across pages
-                })
-
-            except Exception as e:
-                print(f"🔥 Error processing review: {e}")
+            if card["rating"] is None or card["date"] is None or card["content"] is None:
+                print(f"🔥 Error processing review: incomplete card on page {page}")
+                continue
+
+            page_reviews.append({
+                "app_name": app_name,
+                "date": card["date"],
+                "star_rating": float(card["rating"]),  # JS numbers like 5 arrive as int
+                "content": card["content"],
+                "overall_score": overall_score  # ✅ Persist across pages
+            })
+
+        # Keep only reviews earlier runs missed; they are newest first, so a fully collected page
+        # means older pages are collected too
+        new_reviews = [r for r in page_reviews if _review_key(app_url, r["date"], r["content"]) not in seen]
+        if page_reviews and not new_reviews:
+            print(f"⏹ Page {page} for {app_name} was already collected, stopping.")
+            break
+        reviews.extend(new_reviews)
 
         # Check if there's a "Next" page
         next_button = driver.find_elements(By.CSS_SELECTOR, "a[rel='next']")
@@ -89,28 +333,35 @@ def fetch_reviews(app_url, app_name):
 
         page += 1  # Move to next page
 
-    driver.quit()
-    return reviews
+    return reviews, overall_score
+
+def fetch_reviews_worker(task):
+    """Process-pool entry point: scrape one app with this worker's Chrome (drivers can't be pickled)."""
+    index, link, app_name, seen = task
+    time.sleep(index * WORKER_STAGGER)  # Stagger requests so they don't all hit Shopify at once
+    print(f"🔄 Falling back to headless Chrome for: {app_name} ({link})")
+    return fetch_reviews_selenium(_DRIVER, link, app_name, seen)
 
 def save_new_reviews(review_data):
-    """Save new review data into a separate CSV file with a timestamp."""
+    """Save this run's new reviews into a separate CSV file with a timestamp.
+
+    Reviews already in historical_reviews.csv are not fetched again, so the file is a delta of
+    what this run added, not a snapshot of every review; historical_reviews.csv is the full history.
+    """
     os.makedirs(CSV_FOLDER, exist_ok=True)
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     filename = os.path.join(CSV_FOLDER, f"reviews_{timestamp}.csv")
 
-    with open(filename, "w", newline="", encoding="utf-8") as f:  # ✅ Ensures correct encoding
+    rows = [
+        (review["app_name"], review["date"], review["star_rating"], review["content"], review["overall_score"])
+        for reviews in review_data.values()
+        for review in reviews
+    ]
+
+    with open(filename, "w", newline="", buffering=CSV_BUFFER_SIZE, encoding="utf-8") as f:  # ✅ Ensures correct encoding
         writer = csv.writer(f)
         writer.writerow(["App Name", "Review Date", "Star Rating", "Review Content", "Overall Score"])
-
-        for app_url, reviews in review_data.items():
-            for review in reviews:
-                writer.writerow([
-                    review["app_name"],
-                    review["date"],
-                    review["star_rating"],
-                    review["content"],
-                    review["overall_score"]
-                ])
+        writer.writerows(rows)
 
     print(f"✅ New reviews saved: {filename}")
 
@@ -120,50 +371,97 @@ def save_historical_reviews(review_data):
     os.makedirs(CSV_FOLDER, exist_ok=True)  
     filename = os.path.join(CSV_FOLDER, "historical_reviews.csv")  
 
-    file_exists = os.path.isfile(filename)
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Timestamp when data was collected
 
-    with open(filename, "a", newline="", encoding="utf-8") as f:  # ✅ UTF-8 for special characters
+    rows = []
+    for app_url, reviews in review_data.items():
+        if not reviews:
+            continue
+        app_name = reviews[0]["app_name"]  # Same for every review of an app
+        rows.extend(
+            (timestamp, app_name, app_url, review["date"], review["star_rating"],
+             review["content"], review["overall_score"])
+            for review in reviews
+        )
+
+    with open(filename, "a", newline="", buffering=CSV_BUFFER_SIZE, encoding="utf-8") as f:  # ✅ UTF-8 for special characters
         writer = csv.writer(f)
 
-        if not file_exists:  # If file doesn't exist, add headers
+        if f.tell() == 0:  # If the file is new (or empty), add headers
             writer.writerow(["date_collected", "app_name", "app_url", "review_date", "star_rating", "review_content", "overall_score"])
 
-        for app_url, reviews in review_data.items():  
-            app_name = reviews[0]["app_name"] if reviews else "Unknown App"
-
-            for review in reviews:
-                writer.writerow([
-                    timestamp,
-                    app_name,
-                    app_url,
-                    review["date"],
-                    review["star_rating"],
-                    review["content"],
-                    review["overall_score"]
-                ])
+        writer.writerows(rows)
 
     print(f"✅ Historical reviews saved: {filename}")
 
+def save_overall_scores(tasks, overall_scores):
+    """Append every app's overall score from this run, including apps without new reviews."""
+    os.makedirs(CSV_FOLDER, exist_ok=True)
+    filename = os.path.join(CSV_FOLDER, "historical_overall_scores.csv")
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Timestamp when data was collected
+    rows = [
+        (timestamp, app_name, link, overall_scores[link])
+        for link, app_name in tasks
+        if overall_scores.get(link) is not None
+    ]
+
+    with open(filename, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+
+        if f.tell() == 0:  # If the file is new (or empty), add headers
+            writer.writerow(["date_collected", "app_name", "app_url", "overall_score"])
+
+        writer.writerows(rows)
+
+    print(f"✅ Overall scores saved: {filename}")
+
 def main():
-    """Load Top 5 apps, fetch reviews once, and save to both new & historical files."""
+    """Load Top 5 apps, fetch new reviews once, and save them plus every app's overall score."""
     with open("data/top_5_links.json", "r") as f:
         review_links = json.load(f)
 
-    with open("data/past_apps.json", "r") as f:
+    # check_new_apps.py writes this file as raw UTF-8 (orjson), so don't depend on the locale
+    with open("data/past_apps.json", "r", encoding="utf-8") as f:
         past_data = json.load(f)
 
     app_name_map = {app["url"]: app["name"] for app in past_data["top_5"]}
 
-    all_reviews = {}
-
-    for link in review_links:
-        app_name = app_name_map.get(link.split("/reviews")[0], "Unknown App")
+    tasks = [(link, app_name_map.get(link.split("/reviews")[0], "Unknown App")) for link in review_links]
+    for link, app_name in tasks:
         print(f"📥 Fetching reviews for: {app_name} ({link})")
-        all_reviews[link] = fetch_reviews(link, app_name)
+
+    seen = load_seen_reviews()
+    results = asyncio.run(_fetch_all_reviews(tasks, seen))
+
+    # Apps Shopify wouldn't serve as plain HTML are retried in parallel headless Chrome processes
+    # (Selenium isn't thread-safe); each worker starts one Chrome and reuses it for all its apps
+    challenged = [(link, app_name) for link, app_name in tasks if results[link] is None]
+    if challenged:
+        # Each task is pickled to its worker, so it carries only its own app's keys, not the whole history
+        seen_by_link = {link: set() for link, _ in challenged}
+        for key in seen:
+            if key[0] in seen_by_link:
+                seen_by_link[key[0]].add(key)
+        fallback = [(i, link, app_name, seen_by_link[link]) for i, (link, app_name) in enumerate(challenged)]
+
+        # Resolve chromedriver once so the workers don't race on the download
+        driver_path = ChromeDriverManager().install()
+        profile_slots = multiprocessing.Queue()
+        for slot in range(REVIEW_WORKERS):
+            profile_slots.put(slot)
+
+        with ProcessPoolExecutor(max_workers=min(REVIEW_WORKERS, len(fallback)), initializer=_init_worker,
+                                 initargs=(driver_path, profile_slots)) as executor:
+            for (_, link, _, _), result in zip(fallback, executor.map(fetch_reviews_worker, fallback)):
+                results[link] = result
+
+    all_reviews = {link: reviews for link, (reviews, _) in results.items()}
+    overall_scores = {link: overall_score for link, (_, overall_score) in results.items()}
 
     save_new_reviews(all_reviews)
     save_historical_reviews(all_reviews)
+    save_overall_scores(tasks, overall_scores)
 
 if __name__ == "__main__":
     main()
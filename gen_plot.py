@@ -1,47 +1,92 @@
+import os
+import matplotlib
+
+# Render off-screen unless the plot window is asked for (SHOW_PLOT=1)
+if not os.environ.get("SHOW_PLOT"):
+    matplotlib.use("Agg")
+
 import seaborn as sns
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
-import os
 
 # 🕓 Timestamp for dynamic file naming
 timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
 # 📂 File paths
+# fetch_reviews.py only writes reviews that earlier runs had not collected, so each reviews_*.csv
+# is a delta, not a full snapshot; cumulative counts are only complete for a file that holds the
+# app's whole history (such as the first export, or several exports concatenated)
 INPUT_CSV = "data/csv_exports/reviews_2025-04-04_13-01-15.csv"
 EXPORT_CSV = f"data/csv_exports/ridgeplot_data_{timestamp}.csv"
 PLOT_OUTPUT = f"data/csv_exports/ridgeplot_cumulative_{timestamp}.png"
 
+CSV_CHUNK_SIZE = 200_000  # Rows parsed at a time from INPUT_CSV
+KDE_MAX_ROWS_PER_APP = 5000  # KDE cost grows with input size; a random sample keeps the same shape
+
 # Ensure export directory exists
 os.makedirs(os.path.dirname(EXPORT_CSV), exist_ok=True)
 
 print("📂 Loading review data...")
-df = pd.read_csv(INPUT_CSV)
-
-# 🧠 Rename and parse dates
-print("📅 Parsing dates...")
-df = df.rename(columns={
-    "App Name": "app_name",
-    "Review Date": "review_date",
-    "Star Rating": "star_rating",
-    "Review Content": "review_content",
-    "Overall Score": "overall_score"
-})
-df["review_date"] = pd.to_datetime(df["review_date"], errors="coerce")
-df = df.dropna(subset=["review_date"])
-
-# 🧹 Deduplicate
-print("🧹 Removing duplicates...")
-df = df.drop_duplicates(subset=["app_name", "review_date", "review_content"])
-
-# 📊 Sort by date
-df = df.sort_values(by="review_date")
+# Stream the CSV so memory stays bounded by the chunk size plus one 8-byte hash per unique review.
+# Only the columns the plot uses are read, typed and date-parsed in the same pass
+chunks = pd.read_csv(
+    INPUT_CSV,
+    usecols=["App Name", "Review Date", "Review Content"],
+    dtype={"App Name": "category"},
+    parse_dates=["Review Date"],
+    chunksize=CSV_CHUNK_SIZE,
+)
 
-# 📈 Group and count reviews per day
-review_counts = df.groupby(["app_name", "review_date"]).size().reset_index(name="review_count")
+seen_hashes = np.empty(0, dtype=np.uint64)  # Sorted row hashes of every review counted so far
+chunk_counts = []
+for chunk in chunks:
+    # 🧠 Rename and parse dates
+    chunk = chunk.rename(columns={
+        "App Name": "app_name",
+        "Review Date": "review_date",
+        "Review Content": "review_content",
+    })
+    if not pd.api.types.is_datetime64_any_dtype(chunk["review_date"]):
+        # read_csv leaves the column as text if any value fails to parse; coerce those to NaT
+        chunk["review_date"] = pd.to_datetime(chunk["review_date"], errors="coerce")
+    chunk = chunk.dropna(subset=["review_date"])
+
+    # 🧹 Deduplicate on one fixed-width hash of (app_name, review_date, review_content), within
+    # the chunk and against every earlier chunk. seen_hashes stays sorted, so the lookup is a
+    # binary search and merging in the new hashes is a single linear insert
+    row_hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    chunk_hashes, first_rows = np.unique(row_hashes, return_index=True)
+    positions = np.searchsorted(seen_hashes, chunk_hashes)
+    is_seen = positions < len(seen_hashes)
+    is_seen[is_seen] = seen_hashes[positions[is_seen]] == chunk_hashes[is_seen]
+    seen_hashes = np.insert(seen_hashes, positions[~is_seen], chunk_hashes[~is_seen])
+    new_rows = np.zeros(len(chunk), dtype=bool)
+    new_rows[first_rows[~is_seen]] = True
+    chunk = chunk[new_rows]
+
+    # 📈 Count reviews per app per day in a single hash-group pass
+    chunk_counts.append(
+        chunk.value_counts(["app_name", "review_date"], sort=False)
+        .loc[lambda counts: counts > 0]  # pandas < 3 also emits unobserved category combinations
+    )
+print(f"🧹 {len(seen_hashes)} unique reviews after removing duplicates")
+if not any(len(counts) for counts in chunk_counts):
+    raise SystemExit(f"⚠ No dated reviews in {INPUT_CSV}, nothing to plot.")
+
+# An (app, day) can span chunks, so sum the per-chunk counts
+review_counts = (
+    pd.concat(chunk_counts)
+    .groupby(level=["app_name", "review_date"], sort=False, observed=True)
+    .sum()
+    .rename("review_count")
+    .reset_index()
+    .sort_values(["app_name", "review_date"], ignore_index=True)
+)
 
-# ➕ Cumulative sum
-review_counts["cumulative_reviews"] = review_counts.groupby("app_name")["review_count"].cumsum()
+# ➕ Cumulative sum (rows are already in date order within each app)
+review_counts["cumulative_reviews"] = review_counts.groupby("app_name", sort=False, observed=True)["review_count"].cumsum()
 
 # 💾 Export processed data
 print("💾 Exporting cleaned data...")
@@ -50,12 +95,19 @@ print(f"✅ Data saved: {EXPORT_CSV}")
 
 # 🎨 Plotting
 print("📊 Creating plot...")
-plt.figure(figsize=(14, 8))
+fig = plt.figure(figsize=(14, 8))
 sns.set_theme(style="whitegrid")
 
-# KDE background
+# KDE background (densities are per app, so sampling large apps doesn't change the curves' scale)
+kde_input = review_counts
+if review_counts["app_name"].value_counts().max() > KDE_MAX_ROWS_PER_APP:
+    kde_input = (
+        review_counts.sample(frac=1, random_state=0)
+        .groupby("app_name", observed=True)
+        .head(KDE_MAX_ROWS_PER_APP)
+    )
 sns.kdeplot(
-    data=review_counts,
+    data=kde_input,
     x="review_date",
     hue="app_name",
     fill=True,
@@ -92,6 +144,8 @@ plt.xticks(rotation=45)
 plt.tight_layout()
 
 # 💾 Save and show
-plt.savefig(PLOT_OUTPUT, dpi=300)
-plt.show()
-print(f"✅ Plot saved: {PLOT_OUTPUT}")
\ No newline at end of file
+plt.savefig(PLOT_OUTPUT, dpi=150, bbox_inches="tight")
+print(f"✅ Plot saved: {PLOT_OUTPUT}")
+if os.environ.get("SHOW_PLOT"):
+    plt.show()
+plt.close(fig)
\ No newline at end of file
@@ -1,12 +1,28 @@
 import pandas as pd
-import json
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import argparse
+import csv
+import functools
+import orjson
 import os
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 # Constants
 REVIEWS_CSV = "data/csv_exports/historical_reviews.csv"
 RANKS_JSON = "data/past_apps.json"
+OVERALL_SCORES_CSV = "data/csv_exports/historical_overall_scores.csv"  # Every app's overall score per scrape
+RANK_FIELDS = ["name", "rank", "previous_rank", "ad"]  # The only all_apps fields analysed
 TREND_REPORT_CSV = "data/csv_exports/trend_analysis.csv"
+CSV_BUFFER_SIZE = 1 << 20  # 1 MiB write buffer for the report
+REVIEWS_CACHE = "data/csv_exports/historical_reviews.parquet"  # Parsed copy of REVIEWS_CSV
+REVIEW_COLUMNS = ["app_name", "review_date", "star_rating", "overall_score"]  # The only columns analysed
+REVIEW_DTYPES = {"app_name": "category", "star_rating": "float64", "overall_score": "float64"}
+REVIEW_DATE_FORMAT = "%B %d, %Y"  # Shopify's review dates, e.g. "March 3, 2025"
+CACHE_KEY = b"source_csv"  # Parquet metadata entry recording which CSV version the cache holds
+CACHE_LAYOUT = 2  # Bump whenever load_reviews changes what the cache stores (2: sorted by review_date)
 
 # Adjustable thresholds
 THRESHOLD_REVIEWS = 10    # Reviews in the lookback period to be considered "explosive"
@@ -16,141 +32,296 @@ MAX_RANK_ANALYSIS = 15 * 20  # Limit analysis to the top 15 pages (approx. 20 ap
 REVIEW_LOOKBACK_DAYS = 30  # ✅ Set dynamic review lookback window
 THRESHOLD_RATING_DROP = 0.2  # ✅ Minimum rating drop to flag an app
 
-def main():
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(TREND_REPORT_CSV), exist_ok=True)
-
-    # Load rankings JSON
-    if not os.path.exists(RANKS_JSON):
-        print(f"❌ {RANKS_JSON} not found. Skipping ranking trend analysis.")
-        return
-
-    with open(RANKS_JSON, "r") as f:
-        past_data = json.load(f)
-
-    # Convert JSON ranking data to DataFrame
-    rank_df = pd.DataFrame(past_data.get("all_apps", []))
+@dataclass(frozen=True)
+class Config:
+    """Thresholds and output path for one run; defaults are the constants above."""
+    threshold_reviews: int = THRESHOLD_REVIEWS
+    threshold_rank_jump: int = THRESHOLD_RANK_JUMP
+    top_n: int = TOP_N
+    lookback_days: int = REVIEW_LOOKBACK_DAYS
+    threshold_rating_drop: float = THRESHOLD_RATING_DROP
+    report_path: str = TREND_REPORT_CSV
+
+def load_reviews():
+    """Load REVIEWS_CSV sorted by review_date, reusing the Parquet cache while the CSV's mtime and size are unchanged."""
+    stat = os.stat(REVIEWS_CSV)
+    source_key = f"{CACHE_LAYOUT}:{stat.st_mtime_ns}:{stat.st_size}".encode()
+
+    if os.path.exists(REVIEWS_CACHE):
+        metadata = pq.read_schema(REVIEWS_CACHE).metadata or {}
+        if metadata.get(CACHE_KEY) == source_key:
+            return pd.read_parquet(REVIEWS_CACHE, columns=REVIEW_COLUMNS, engine="pyarrow")
+
+    print(f"📂 Parsing {REVIEWS_CSV} (cache is missing or stale)...")
+    reviews_df = pd.read_csv(
+        REVIEWS_CSV,
+        usecols=REVIEW_COLUMNS,
+        dtype=REVIEW_DTYPES,
+        parse_dates=["review_date"],
+        date_format=REVIEW_DATE_FORMAT,  # Known format, so no per-file inference
+    )
+    if not pd.api.types.is_datetime64_any_dtype(reviews_df["review_date"]):
+        # read_csv leaves the column as text if any value doesn't match; infer and coerce the rest to NaT
+        reviews_df["review_date"] = pd.to_datetime(reviews_df["review_date"], errors="coerce")
+    # Sorted once here (and cached sorted) so date windows are binary searches; NaT goes first
+    reviews_df = reviews_df.sort_values("review_date", kind="mergesort", na_position="first", ignore_index=True)
+
+    table = pa.Table.from_pandas(reviews_df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), CACHE_KEY: source_key})
+    pq.write_table(table, REVIEWS_CACHE, compression="zstd")
+    return reviews_df
+
+def _to_rank(column, fill):
+    """Convert a rank column to int32 in one pass, using `fill` for missing or non-numeric ranks."""
+    ranks = pd.to_numeric(column, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return np.where(np.isnan(ranks), fill, ranks).astype(np.int32)
+
+def _count_and_average(app_names, ratings, count_column):
+    """Per app, the number of reviews (as count_column) and their mean rating (missing ratings count but aren't averaged)."""
+    codes, apps = pd.factorize(app_names, sort=True)
+    ratings = ratings.to_numpy(dtype=float)
+    rated = (codes >= 0) & ~np.isnan(ratings)  # factorize codes a missing app name as -1
+    counts = np.bincount(codes[codes >= 0], minlength=len(apps))
+    with np.errstate(invalid="ignore", divide="ignore"):  # Apps with no ratings average to NaN
+        means = (
+            np.bincount(codes[rated], weights=ratings[rated], minlength=len(apps))
+            / np.bincount(codes[rated], minlength=len(apps))
+        )
+    return pd.DataFrame({
+        "app_name": apps,
+        count_column: counts,
+        "recent_avg_rating": means,
+    })
+
+def _write_table(writer, df):
+    """Write df's header and rows through a csv.writer (for small tables without missing values)."""
+    writer.writerow(df.columns)
+    writer.writerows(df.itertuples(index=False, name=None))
+
+def _by_app(df, app_dtype):
+    """Index df by app_name converted to app_dtype, so joins between such frames match on category codes."""
+    return df.astype({"app_name": app_dtype}).set_index("app_name")
+
+@functools.lru_cache(maxsize=4)
+def load_rank_df(path, mtime_ns, size):
+    """Load the organic rankings from past_apps.json; mtime_ns and size only key the cache."""
+    with open(path, "rb") as f:
+        past_data = orjson.loads(f.read())
+
+    # Convert JSON ranking data to DataFrame, keeping only the fields the analysis reads
+    rank_df = pd.DataFrame.from_records(past_data.get("all_apps", []), columns=RANK_FIELDS)
+    # Arrow-backed strings instead of Python objects: contiguous UTF-8 that hashes and compares in C
+    rank_df["name"] = rank_df["name"].astype("string[pyarrow]")
 
     # ✅ Ensure 'rank' column exists
     if "rank" not in rank_df.columns or rank_df["rank"].isnull().all():
         rank_df["rank"] = 300  # Assign a default high rank (adjustable)
 
     # ✅ Convert 'rank' to numeric, filling NaNs with 300
-    rank_df["rank"] = pd.to_numeric(rank_df["rank"], errors="coerce").fillna(300).astype(int)
+    rank_df["rank"] = _to_rank(rank_df["rank"], 300)
 
     # ✅ Rename columns after ensuring 'rank' exists
     rank_df = rank_df.rename(columns={"name": "app_name", "rank": "current_rank"})
 
-    # Exclude ads from the analysis
-    if "ad" in rank_df.columns:
+    # Exclude ads from the analysis (when the snapshot records them at all)
+    if rank_df["ad"].notna().any():
         rank_df = rank_df[rank_df["ad"] == False]  # Keep only organic results
 
+    return rank_df
+
+def _report_is_fresh(report_path):
+    """True if the report was written after the last change to every input that exists."""
+    input_mtimes = [os.stat(path).st_mtime_ns for path in (RANKS_JSON, REVIEWS_CSV, OVERALL_SCORES_CSV)
+                    if os.path.exists(path)]
+    if not input_mtimes or not os.path.exists(report_path):
+        return False
+    return os.stat(report_path).st_mtime_ns >= max(input_mtimes)
+
+def run(cfg=Config(), force=False):
+    """Write the trend report for one set of thresholds, unless it is already newer than its inputs."""
+    # The inputs only change when the scrapers run, so repeated runs in between have nothing to do.
+    # Only the input files are compared, so changed thresholds need force=True (--force)
+    if not force and _report_is_fresh(cfg.report_path):
+        print(f"✅ {cfg.report_path} is newer than its inputs, nothing to do.")
+        return
+
+    count_column = f"new_reviews_last_{cfg.lookback_days}_days"
+
+    # Ensure directory exists
+    os.makedirs(os.path.dirname(cfg.report_path), exist_ok=True)
+
+    # Load rankings JSON
+    if not os.path.exists(RANKS_JSON):
+        print(f"❌ {RANKS_JSON} not found. Skipping ranking trend analysis.")
+        return
+
+    # Reuse the parsed rankings while past_apps.json is unchanged; copy since run() adds columns
+    stat = os.stat(RANKS_JSON)
+    rank_df = load_rank_df(RANKS_JSON, stat.st_mtime_ns, stat.st_size).copy()
+
     # Load reviews CSV
     if not os.path.exists(REVIEWS_CSV):
         print(f"❌ {REVIEWS_CSV} not found. Skipping review trend analysis.")
         reviews_df = pd.DataFrame()  # ✅ Assign an empty DataFrame to avoid NameError
     else:
-        reviews_df = pd.read_csv(REVIEWS_CSV)
-
-    if "review_date" in reviews_df.columns:
-        reviews_df["review_date"] = pd.to_datetime(reviews_df["review_date"], errors="coerce")
+        reviews_df = load_reviews()
 
     # **Explosive Review Growth**
-    weekly_counts = pd.DataFrame(columns=["app_name", f"new_reviews_last_{REVIEW_LOOKBACK_DAYS}_days"])
-    avg_recent_rating = pd.DataFrame(columns=["app_name", "recent_avg_rating"])
+    weekly_counts = pd.DataFrame(columns=["app_name", count_column, "recent_avg_rating"])
 
     if not rank_df.empty and not reviews_df.empty:
         last_date = reviews_df["review_date"].max()
-        review_window_start = last_date - timedelta(days=REVIEW_LOOKBACK_DAYS - 1)
+        review_window_start = last_date - timedelta(days=cfg.lookback_days - 1)
 
         # ✅ Ensure recent_reviews is always defined
-        recent_reviews = reviews_df[reviews_df["review_date"] >= review_window_start]
+        if pd.isna(last_date):
+            recent_reviews = reviews_df.iloc[:0]  # No parseable dates, so nothing is recent
+        else:
+            # reviews_df is sorted by date with NaT first, so the window is a suffix found by binary
+            # search; the search only covers the dated rows, as it expects NaT to sort last
+            review_dates = reviews_df["review_date"]
+            n_undated = int(review_dates.isna().sum())
+            window_start = n_undated + review_dates.iloc[n_undated:].searchsorted(review_window_start, side="left")
+            recent_reviews = reviews_df.iloc[window_start:]
 
         if not recent_reviews.empty:
-            # ✅ Count reviews in the last X days
-            weekly_counts = recent_reviews.groupby("app_name").size().reset_index(
-                name=f"new_reviews_last_{REVIEW_LOOKBACK_DAYS}_days"
-            )
+            # ✅ Count reviews and average star rating in the last X days with bincount over the app codes
+            weekly_counts = _count_and_average(recent_reviews["app_name"], recent_reviews["star_rating"], count_column)
 
-            # ✅ Compute average star rating in the lookback period
-            avg_recent_rating = recent_reviews.groupby("app_name")["star_rating"].mean().reset_index(
-                name="recent_avg_rating"
-            )
+            # ✅ Remove apps without enough reviews before joining, so the joins only see explosive apps
+            weekly_counts = weekly_counts[weekly_counts[count_column] > cfg.threshold_reviews]
 
     # ✅ Ensure `weekly_counts` exists to prevent merge errors
     if weekly_counts.empty:
-        weekly_counts = pd.DataFrame(columns=["app_name", f"new_reviews_last_{REVIEW_LOOKBACK_DAYS}_days"])
+        weekly_counts = pd.DataFrame(columns=["app_name", count_column, "recent_avg_rating"])
 
     # ✅ Ensure `overall_score` exists in `reviews_df`
+    score_sources = []
     if "overall_score" in reviews_df.columns and not reviews_df.empty:
-        overall_ratings = reviews_df[["app_name", "overall_score"]].drop_duplicates()
+        # One score per app, hashing only app_name; reviews are date-sorted, so last() is the latest score
+        score_sources.append(reviews_df[["app_name", "overall_score"]])
+    if os.path.exists(OVERALL_SCORES_CSV):
+        # Recorded every run, even for apps without new reviews; appended in collection order, so it goes last
+        score_sources.append(pd.read_csv(OVERALL_SCORES_CSV, usecols=["app_name", "overall_score"]))
+    if score_sources:
+        overall_ratings = (
+            pd.concat(score_sources, ignore_index=True)
+            .groupby("app_name", observed=True, sort=False)["overall_score"].last()
+            .reset_index()
+        )
     else:
         overall_ratings = pd.DataFrame(columns=["app_name", "overall_score"])
 
-    # ✅ Merge data for explosive reviews
-    explosive_reviews_table = weekly_counts.merge(rank_df[["app_name", "current_rank"]], on="app_name", how="left")
-    explosive_reviews_table = explosive_reviews_table.merge(overall_ratings, on="app_name", how="left")
-    explosive_reviews_table = explosive_reviews_table.merge(avg_recent_rating, on="app_name", how="left")
+    # ✅ Merge data for explosive reviews, joining on a shared categorical index so keys compare as integer codes
+    app_dtype = pd.CategoricalDtype(
+        pd.concat([weekly_counts["app_name"], rank_df["app_name"], overall_ratings["app_name"]]).astype(object).dropna().unique()
+    )
+    explosive_reviews_table = (
+        _by_app(weekly_counts, app_dtype)
+        .join(_by_app(rank_df[["app_name", "current_rank"]], app_dtype), how="left")
+        .join(_by_app(overall_ratings, app_dtype), how="left")
+        .reset_index()
+    )
+    explosive_reviews_table = explosive_reviews_table[[
+        "app_name", count_column, "current_rank", "overall_score", "recent_avg_rating"
+    ]]
 
     # ✅ Compute rating drop
     explosive_reviews_table["rating_drop"] = explosive_reviews_table["overall_score"] - explosive_reviews_table["recent_avg_rating"]
 
     # ✅ Flag significant drops
-    explosive_reviews_table["rating_drop_alert"] = explosive_reviews_table["rating_drop"].apply(
-        lambda x: f"🚨 Rating dropped by {x:.2f}" if x > THRESHOLD_RATING_DROP else "✅ Stable"
-    )
-
-    # ✅ Remove apps without enough reviews
-    explosive_reviews_table = explosive_reviews_table[
-        explosive_reviews_table[f"new_reviews_last_{REVIEW_LOOKBACK_DAYS}_days"] > THRESHOLD_REVIEWS
-    ]
+    # Vectorized mask; only the flagged rows need a formatted message
+    drops = explosive_reviews_table["rating_drop"].to_numpy(dtype=float)
+    dropped = drops > cfg.threshold_rating_drop
+    alerts = np.full(len(drops), "✅ Stable", dtype=object)
+    alerts[dropped] = [f"🚨 Rating dropped by {x:.2f}" for x in drops[dropped]]
+    explosive_reviews_table["rating_drop_alert"] = alerts
 
     # **Ranking Jumps**
     ranking_jumps_table = pd.DataFrame(columns=["app_name", "current_rank", "previous_rank", "rank_change"])
 
     if not rank_df.empty:
-        # Convert ranks to numeric
-        rank_df["previous_rank"] = pd.to_numeric(rank_df["previous_rank"], errors="coerce").fillna(300).astype(int)
-        rank_df["current_rank"] = pd.to_numeric(rank_df["current_rank"], errors="coerce").fillna(MAX_RANK_ANALYSIS).astype(int)
+        # Convert ranks to numeric (current_rank was already converted when it was still "rank")
+        previous = _to_rank(rank_df["previous_rank"], 300)
+        current = rank_df["current_rank"].to_numpy()
 
         # Calculate rank change
-        rank_df["rank_change"] = rank_df["previous_rank"] - rank_df["current_rank"]
-
-        # ✅ Filter out apps where previous_rank was 300 (new apps) to avoid false jumps
-        ranking_jumps_table = rank_df[
-            (rank_df["previous_rank"] < 300)
-            & (rank_df["rank_change"] > THRESHOLD_RANK_JUMP)
-            & ((rank_df["previous_rank"] <= MAX_RANK_ANALYSIS) | (rank_df["current_rank"] <= MAX_RANK_ANALYSIS))
-        ].sort_values("rank_change", ascending=False)[["app_name", "current_rank", "previous_rank", "rank_change"]]
+        change = previous - current
+        rank_df["previous_rank"] = previous
+        rank_df["rank_change"] = change
+
+        # ✅ Filter out apps where previous_rank was 300 (new apps) to avoid false jumps; one mask over the int32 arrays
+        jumped = (
+            (previous < 300)
+            & (change > cfg.threshold_rank_jump)
+            & ((previous <= MAX_RANK_ANALYSIS) | (current <= MAX_RANK_ANALYSIS))
+        )
+        ranking_jumps_table = rank_df.iloc[np.flatnonzero(jumped)].sort_values("rank_change", ascending=False)[
+            ["app_name", "current_rank", "previous_rank", "rank_change"]
+        ]
 
     # **Newcomers into Top 5**
     newcomers_table = pd.DataFrame(columns=["app_name", "current_rank", "displaced_app"])
 
     if not rank_df.empty:
-        prev_top5_set = set(rank_df[rank_df["previous_rank"] <= TOP_N]["app_name"])
-        curr_top5_set = set(rank_df[rank_df["current_rank"] <= TOP_N]["app_name"])
-
-        new_entries = sorted(curr_top5_set - prev_top5_set)
-        displaced_apps = sorted(prev_top5_set - curr_top5_set)
-
-        for i, new_app in enumerate(new_entries):
-            displaced_app = displaced_apps[i] if i < len(displaced_apps) else "N/A"
-            newcomers_table = pd.concat([
-                newcomers_table,
-                pd.DataFrame([{"app_name": new_app, "current_rank": rank_df.loc[rank_df["app_name"] == new_app, "current_rank"].min(), "displaced_app": displaced_app}])
-            ], ignore_index=True)
+        # Sorted unique name arrays, so the set differences below stay in numpy and come out sorted
+        prev_top = np.unique(rank_df.loc[rank_df["previous_rank"] <= cfg.top_n, "app_name"].dropna().to_numpy())
+        # Every newcomer's best rank is inside the top N, so its rows there are all the lookups need
+        curr_top_ranks = rank_df.loc[rank_df["current_rank"] <= cfg.top_n, ["app_name", "current_rank"]].set_index("app_name")
+        curr_top = np.unique(curr_top_ranks.index.dropna().to_numpy())
+
+        new_entries = np.setdiff1d(curr_top, prev_top, assume_unique=True)
+        if new_entries.size:
+            # Pair newcomers with displaced apps by sorted position; extra newcomers displaced nobody
+            displaced_apps = np.setdiff1d(prev_top, curr_top, assume_unique=True)[:new_entries.size]
+            newcomers_table = pd.DataFrame({
+                "app_name": new_entries,
+                "current_rank": curr_top_ranks.groupby(level="app_name")["current_rank"].min().reindex(new_entries).to_numpy(),
+                "displaced_app": np.concatenate([
+                    displaced_apps, np.full(new_entries.size - displaced_apps.size, "N/A", dtype=object)
+                ]),
+            })
 
     # **Generate Trend Analysis Report**
-    with open(TREND_REPORT_CSV, "w") as f:
+    # One large buffer so the headers and all three tables reach the disk in a single flush
+    with open(cfg.report_path, "w", buffering=CSV_BUFFER_SIZE) as f:
         f.write(f"trend_analysis\n\n")
-        f.write(f"Explosive Review Growth (Last {REVIEW_LOOKBACK_DAYS} Days)\n")
-        explosive_reviews_table.to_csv(f, index=False)
+        f.write(f"Explosive Review Growth (Last {cfg.lookback_days} Days)\n")
+        explosive_reviews_table.to_csv(f, index=False, lineterminator="\n")
+        # The two small tables have no missing values, so plain csv rows skip to_csv's setup cost
+        writer = csv.writer(f, lineterminator="\n")
         f.write("\n\nRanking Jumps\n")
-        ranking_jumps_table.to_csv(f, index=False)
-        f.write("\n\nNewcomers to Top 5\n")
-        newcomers_table.to_csv(f, index=False)
+        _write_table(writer, ranking_jumps_table)
+        f.write(f"\n\nNewcomers to Top {cfg.top_n}\n")
+        _write_table(writer, newcomers_table)
 
-    print("\n📊 **Trend Analysis Report Generated!**")
+    print(f"\n📊 **Trend Analysis Report Generated!** ({cfg.report_path})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Report review surges, ranking jumps and top-N newcomers.")
+    parser.add_argument("--lookback", type=int, default=REVIEW_LOOKBACK_DAYS,
+                        help="Days of reviews counted as recent")
+    parser.add_argument("--threshold-reviews", type=int, default=THRESHOLD_REVIEWS,
+                        help="Recent reviews an app needs to count as explosive")
+    parser.add_argument("--threshold-rank-jump", type=int, default=THRESHOLD_RANK_JUMP,
+                        help="Rank improvement needed to report a jump")
+    parser.add_argument("--top-n", type=int, default=TOP_N,
+                        help="Size of the top list tracked for newcomers")
+    parser.add_argument("--threshold-rating-drop", type=float, default=THRESHOLD_RATING_DROP,
+                        help="Drop of the recent average below the overall score that raises an alert")
+    parser.add_argument("--output", default=TREND_REPORT_CSV, help="Path of the report CSV")
+    parser.add_argument("--force", action="store_true",
+                        help="Rewrite the report even if it is newer than its inputs (e.g. after changing thresholds)")
+    args = parser.parse_args()
+
+    run(Config(
+        threshold_reviews=args.threshold_reviews,
+        threshold_rank_jump=args.threshold_rank_jump,
+        top_n=args.top_n,
+        lookback_days=args.lookback,
+        threshold_rating_drop=args.threshold_rating_drop,
+        report_path=args.output,
+    ), force=args.force)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file